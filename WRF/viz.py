@@ -25,6 +25,17 @@ g = 9.81
 contour_colormap = 'RdBu_r' # more soothing blues and reds
 series_colormap = 'viridis'
 
+def _is_netcdf(fpath):
+    """Check for a NetCDF classic/64-bit offset or NetCDF4 (HDF5) file
+    signature without opening the dataset
+    """
+    try:
+        with open(fpath,'rb') as f:
+            magic = f.read(4)
+    except (IOError,OSError):
+        return False
+    return (magic[:3] == b'CDF') or (magic == b'\x89HDF')
+
 class Visualization2D(object):
 
     def __init__(self,*args,**kwargs):
@@ -36,9 +47,17 @@ class Visualization2D(object):
             Grid spacing (assumed uniform)
         parse_datetime : str, optional
             Specified strftime string to parse filenames into datetimes
+        tchunk : int, optional
+            Number of times per dask chunk (after combining files); the
+            memory used by mean reductions scales with the chunk size
+            times the number of dask worker threads
+        dtype : numpy dtype, optional
+            Precision of the field variables, float32 by default
         """
         self.ds = kwargs.get('ds',1.0)
         parse_datetime = kwargs.get('parse_datetime',None)
+        tchunk = kwargs.get('tchunk',1)
+        dtype = np.dtype(kwargs.get('dtype',np.float32))
 
         plane = kwargs.get('plane','z') # 2D plane normal direction
         if not plane=='z':
@@ -59,20 +78,17 @@ class Visualization2D(object):
                     inputfiles += glob(fpath)
         else:
             inputfiles = os.listdir('.')
-        filelist = []
-        for fpath in inputfiles:
-            if not os.path.isfile(fpath):
-                continue
-            try:
-                xarray.open_dataset(fpath)
-            except (IOError,OSError):
-                # NetCDF: Unknown file format
-                continue
-            else:
-                filelist.append(fpath)
+        filelist = [ fpath for fpath in inputfiles
+                     if os.path.isfile(fpath) and _is_netcdf(fpath) ]
         filelist.sort()
         self.filelist = filelist
-        self.data = xarray.open_mfdataset(filelist, concat_dim=tdim)
+        # chunk by file/time so that fields are only read as needed
+        self.data = xarray.open_mfdataset(filelist,
+                                          combine='nested', concat_dim=tdim,
+                                          chunks={tdim:tchunk},
+                                          parallel=True)
+        # files typically hold one time each, so rechunk the combined data
+        self.data = self.data.chunk({tdim:tchunk})
 
         """Set up dimensions"""
         self.plane = plane
@@ -96,26 +112,71 @@ class Visualization2D(object):
             self.times = np.arange(self.Ntimes)
 
         """Set up field variables"""
+        # note: fields are kept as lazy (dask-backed) DataArrays; data are
+        # only read from disk when a (reduced) subvolume is computed
+        self.tdim, self.xdim, self.ydim, self.zdim = tdim, xdim, ydim, zdim
         # unstaggered
-        self.T = self.data.variables['T'][:] + 300.0
-        # staggered in x
-        U = self.data.variables['U'][:]
-        self.U = 0.5*(U[:,:,:,:-1] + U[:,:,:,1:])
-        # staggered in y
-        V = self.data.variables['V'][:]
-        self.V = 0.5*(V[:,:,:-1,:] + V[:,:,1:,:])
-        # staggered in z
-        W = self.data.variables['W'][:]
-        PH = self.data.variables['PH'][:]
-        PHB = self.data.variables['PHB'][:]
-        self.W = 0.5*(W[:,:-1,:,:] + W[:,1:,:,:])
+        self.T = self.data['T'].astype(dtype,copy=False) + dtype.type(300.0)
+        # staggered fields are stored as (field, staggered dim, unstaggered
+        # dim) and only destaggered as needed (see _unstagger and _mean)
+        U = self.data['U'].astype(dtype,copy=False)
+        V = self.data['V'].astype(dtype,copy=False)
+        W = self.data['W'].astype(dtype,copy=False)
         # calculate z = (ph + phb)/g
-        self.z = 0.5*( PH[:,:-1,:,:] +  PH[:,1:,:,:] +
-                      PHB[:,:-1,:,:] + PHB[:,1:,:,:] ) / g
+        PH = (self.data['PH'].astype(dtype,copy=False) +
+              self.data['PHB'].astype(dtype,copy=False)) / dtype.type(g)
+        self._staggered = {
+            'U': (U, U.dims[3], xdim),
+            'V': (V, V.dims[2], ydim),
+            'W': (W, W.dims[1], zdim),
+            'z': (PH, PH.dims[1], zdim),
+        }
         # other variables
         #self.Umag = np.sqrt(self.U**2 + self.V**2 + self.W**2) # can cause a memory error
-        self.z_est = np.mean(self.z.values, axis=(2,3))
+        self._z_est = None # estimated heights, calculated as needed
+
+        # persistent plot objects, updated by plot()
+        self._fig = None
+        self._ax = None
+        self._im = None
+        self._cbar = None
+        self._rect = None
+        self._last_xlim = None
+        self._last_ylim = None
         
+    @property
+    def z_est(self):
+        """Domain-averaged height of each cell-centered level, with shape
+        (Ntimes, Nz)
+        """
+        if self._z_est is None:
+            self._z_est = self._mean('z', (0,self.Nx-1), (0,self.Ny-1))
+        return self._z_est
+
+    @property
+    def U(self):
+        return self._unstagger('U')
+
+    @property
+    def V(self):
+        return self._unstagger('V')
+
+    @property
+    def W(self):
+        return self._unstagger('W')
+
+    @property
+    def z(self):
+        return self._unstagger('z')
+
+    def _unstagger(self,field,fld=None):
+        """Return lazy field interpolated to cell centers"""
+        stagfld, stagdim, dim = self._staggered[field]
+        if fld is None:
+            fld = stagfld
+        fld = fld.rolling({stagdim:2}).mean().isel({stagdim:slice(1,None)})
+        return fld.rename({stagdim:dim})
+
     def __repr__(self):
         s = str(self.Ntimes) + ' times read:\n'
         for fpath in self.filelist[:3]:
@@ -141,45 +202,82 @@ class Visualization2D(object):
                                  ylim=ylim_slider)
         display(self.iplot)
 
-    def plot(self,field='U',time=0,index=0,xlim=(0,-1),ylim=(0,-1)):
-        """Callback for Visualization2D.interactive() to make contour plot"""
+    def _setup_plot(self):
+        """Create the figure and image that are updated by plot()"""
         length_units = 'm'
+        # set image left, right, bottom, top
+        extent = np.array((0.0, (self.Nx-1)*self.ds,
+                          (self.Ny-1)*self.ds, 0.0)
+                         ) # note top/bottom flipped when using imshow
+        self._rescale = (np.max(extent) > 10000)
+        if self._rescale:
+            extent /= 1000.
+            length_units = 'km'
+        self._fig = plt.figure(1,figsize=(10,6),clear=True)
+        self._ax = self._fig.add_subplot()
+        # use imshow (fastest)
+        self._im = self._ax.imshow(np.zeros((self.Ny,self.Nx),dtype=np.float32),
+                                   cmap=contour_colormap, extent=extent)
+        # format plot
+        self._ax.set_xlabel('x [{:s}]'.format(length_units))
+        self._ax.set_ylabel('y [{:s}]'.format(length_units))
+        self._ax.invert_yaxis()
+        # add colorbar
+        self._cbar = self._fig.colorbar(self._im, ax=self._ax)
+        self._rect = None
+        self._last_xlim = None
+        self._last_ylim = None
+
+    def _update_box(self,xlim,ylim):
+        """Update the bounding box for the averaging region"""
+        if (xlim[0] > 0) or (xlim[1] < self.Nx-1) \
+                or (ylim[0] > 0) or (ylim[1] < self.Ny-1):
+            xr = np.array(xlim) * self.ds
+            yr = np.array(ylim) * self.ds
+            if self._rescale:
+                xr /= 1000.
+                yr /= 1000.
+            if self._rect is None:
+                self._rect = Rectangle((xr[0],yr[0]), np.diff(xr)[0], np.diff(yr)[0],
+                                       fill=False, color='k', linestyle='--')
+                self._ax.add_patch(self._rect)
+            else:
+                self._rect.set_xy((xr[0],yr[0]))
+                self._rect.set_width(np.diff(xr)[0])
+                self._rect.set_height(np.diff(yr)[0])
+        elif self._rect is not None:
+            self._rect.remove()
+            self._rect = None
+        self._last_xlim = xlim
+        self._last_ylim = ylim
+
+    def plot(self,field='U',time=0,index=0,xlim=(0,-1),ylim=(0,-1)):
+        """Callback for Visualization2D.interactive() to make contour plot
+
+        The figure and image are reused between calls (unless the figure
+        has been closed) so that only the image data are updated.
+        """
         # TODO: Only z-planes handled for now
         if self.plane == 'z':
             assert((index >= 0) and (index < self.Nz))
-            plt.figure(1,figsize=(10,6))
+            # recreate if closed or cleared (e.g., by another instance)
+            if (self._fig is None) \
+                    or (not plt.fignum_exists(self._fig.number)) \
+                    or (self._ax not in self._fig.axes):
+                self._setup_plot()
             U = getattr(self,field)
-            U = U[time,:,:,:]
-            # set image left, right, bottom, top
-            extent = np.array((0.0, (self.Nx-1)*self.ds,
-                              (self.Ny-1)*self.ds, 0.0)
-                             ) # note top/bottom flipped when using imshow
-            if np.max(extent) > 10000:
-                rescale = True
-                extent /= 1000.
-                length_units = 'km'
-            # use imshow (fastest)
-            cont = plt.imshow(U[index,:,:],cmap=contour_colormap,extent=extent)
-            # format plot
-            plt.xlabel('x [{:s}]'.format(length_units))
-            plt.ylabel('y [{:s}]'.format(length_units))
-            plt.gca().invert_yaxis()
-            plt.title('{:s}, z ~= {:.1f} m'.format(str(self.times[time]),
-                                                   self.z_est[time,index]))
-            # add bounding box for averaging region
-            if (xlim[0] > 0) or (xlim[1] < self.Nx-1) \
-                    or (ylim[0] > 0) or (ylim[1] < self.Ny-1):
-                xr = np.array(xlim) * self.ds
-                yr = np.array(ylim) * self.ds
-                if rescale:
-                    xr /= 1000.
-                    yr /= 1000.
-                rect = Rectangle((xr[0],yr[0]), np.diff(xr), np.diff(yr),
-                                 fill=False, color='k', linestyle='--')
-                plt.gca().add_patch(rect)
-            # add colorbar
-            cbar = plt.colorbar(cont)
-            cbar.set_label(field)
+            U = U.isel({self.tdim: time, self.zdim: index}).compute().values
+            frame = np.ascontiguousarray(U, dtype=np.float32)
+            self._im.set_data(frame)
+            self._im.set_clim(np.nanmin(frame), np.nanmax(frame))
+            self._ax.set_title('{:s}, z ~= {:.1f} m'.format(str(self.times[time]),
+                                                            self.z_est[time,index]))
+            # add bounding box for averaging region (only if changed)
+            xlim, ylim = tuple(xlim), tuple(ylim)
+            if (xlim, ylim) != (self._last_xlim, self._last_ylim):
+                self._update_box(xlim, ylim)
+            self._cbar.set_label(field)
+            self._fig.canvas.draw_idle()
         else:
             print(self.plane,'not supported')
         plt.show()
@@ -194,6 +292,29 @@ class Visualization2D(object):
         print('  area is {:.1f} by {:.1f} m^2'.format(self.ds*np.diff(xr)[0],
                                                       self.ds*np.diff(yr)[0]))
 
+    def _mean(self,field,xr,yr,itime=slice(None)):
+        """Average field over the specified horizontal subregion, only
+        reading the subvolume that is needed. For staggered fields, the
+        horizontal average is performed before destaggering so that the
+        full unstaggered field is never formed.
+        """
+        box = {self.tdim: itime,
+               self.ydim: slice(yr[0],yr[1]+1),
+               self.xdim: slice(xr[0],xr[1]+1)}
+        if field in self._staggered:
+            fld, stagdim, dim = self._staggered[field]
+            if dim in box:
+                sl = box.pop(dim)
+                box[stagdim] = slice(sl.start, sl.stop+1)
+            avgdims = [ d for d in (self.ydim,self.xdim) if d in box ]
+            fld = self._unstagger(field, fld.isel(box).mean(dim=avgdims))
+            if dim in (self.ydim,self.xdim):
+                fld = fld.mean(dim=dim)
+        else:
+            fld = getattr(self,field).isel(box)
+            fld = fld.mean(dim=(self.ydim,self.xdim))
+        return fld.compute().values
+
     def plot_mean_profile(self,itime=None,field=None):
         """Plot the mean profile averaged over the xlim and ylim 
         specified by the interactive widgets.
@@ -204,12 +325,10 @@ class Visualization2D(object):
         xr = params['xlim']
         yr = params['ylim']
         self._print_mean_info()
-        z = self.z
         if field is None:
             field = params['field']
-        U = getattr(self,field)
-        zmean = np.mean(z[itime,:,yr[0]:yr[1]+1,xr[0]:xr[1]+1], axis=(1,2))
-        Umean = np.mean(U[itime,:,yr[0]:yr[1]+1,xr[0]:xr[1]+1], axis=(1,2))
+        zmean = self._mean('z', xr, yr, itime)
+        Umean = self._mean(field, xr, yr, itime)
         plt.figure(2, figsize=(4,6))
         plt.plot(Umean, zmean)
         plt.xlabel(field)
@@ -225,13 +344,11 @@ class Visualization2D(object):
         xr = params['xlim']
         yr = params['ylim']
         self._print_mean_info()
-        z = self.z
         if field is None:
             field = params['field']
-        U = getattr(self,field)
         print('averaging {:s} over {:d} times, could take a minute...'.format(field,self.Ntimes))
-        zmean = np.mean(z[:,:,yr[0]:yr[1]+1,xr[0]:xr[1]+1], axis=(2,3))
-        Umean = np.mean(U[:,:,yr[0]:yr[1]+1,xr[0]:xr[1]+1], axis=(2,3))
+        zmean = self._mean('z', xr, yr)
+        Umean = self._mean(field, xr, yr)
         plt.figure(3, figsize=(4,6))
         colfun = cm.get_cmap(series_colormap)
         for itime in range(self.Ntimes):
@@ -254,15 +371,13 @@ class Visualization2D(object):
         xr = params['xlim']
         yr = params['ylim']
         self._print_mean_info()
-        z = self.z
         if field is None:
             field = params['field']
-        U = getattr(self,field)
         print('averaging {:s} over {:d} times, could take a minute...'.format(field,self.Ntimes))
-        zmean = np.mean(z[:,:,yr[0]:yr[1]+1,xr[0]:xr[1]+1], axis=(2,3))
-        Umean = np.mean(U[:,:,yr[0]:yr[1]+1,xr[0]:xr[1]+1], axis=(2,3))
+        zmean = self._mean('z', xr, yr)
+        Umean = self._mean(field, xr, yr)
         plt.figure(4, figsize=(10,4))
-        alltimes = np.tile(self.times,[self.Nz,1]).T
+        alltimes = np.broadcast_to(self.times[:,np.newaxis], zmean.shape)
         cont = plt.contourf(alltimes, zmean, Umean, cmap=contour_colormap)
         cbar = plt.colorbar(cont)
         cbar.set_label(field)
@@ -274,11 +389,11 @@ class Visualization2D(object):
         yr = params['ylim']
         self._print_mean_info()
         print('averaging over {:d} times, could take a minute...'.format(self.Ntimes))
-        zmean = np.mean(self.z[:,:,yr[0]:yr[1]+1,xr[0]:xr[1]+1], axis=(2,3))
-        Umean = np.mean(self.U[:,:,yr[0]:yr[1]+1,xr[0]:xr[1]+1], axis=(2,3))
-        Vmean = np.mean(self.V[:,:,yr[0]:yr[1]+1,xr[0]:xr[1]+1], axis=(2,3))
-        Wmean = np.mean(self.W[:,:,yr[0]:yr[1]+1,xr[0]:xr[1]+1], axis=(2,3))
-        Tmean = np.mean(self.T[:,:,yr[0]:yr[1]+1,xr[0]:xr[1]+1], axis=(2,3))
+        zmean = self._mean('z', xr, yr)
+        Umean = self._mean('U', xr, yr)
+        Vmean = self._mean('V', xr, yr)
+        Wmean = self._mean('W', xr, yr)
+        Tmean = self._mean('T', xr, yr)
         return ForcingTable(heights=zmean, times=self.times,
                             U=Umean, V=Vmean, W=Wmean, T=Tmean)
 
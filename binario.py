@@ -16,6 +16,14 @@ import struct
 import numpy as np
 
 class binaryfile:
+    # precompiled formats for single-value reads
+    _s_int1 = struct.Struct('b')
+    _s_int2 = struct.Struct('h')
+    _s_int4 = struct.Struct('i')
+    _s_int8 = struct.Struct('q')
+    _s_float = struct.Struct('f')
+    _s_double = struct.Struct('d')
+
     def __init__(self,path,mode='r'):
         self.path = path
         self.mode = mode.strip('b')
@@ -49,27 +57,51 @@ class binaryfile:
         except struct.error:
             raise IOError
 
+    def read_struct(self,s):
+        """Read a single value with a precompiled struct.Struct"""
+        try:
+            return s.unpack(self.f.read(s.size))[0]
+        except struct.error:
+            raise IOError
+
+    def read_records(self,fmt,N):
+        """Read N records with the specified struct format, returned as
+        a list of tuples
+        """
+        size = struct.calcsize(fmt)
+        buf = self.f.read(N*size)
+        if len(buf) < N*size:
+            raise IOError
+        return list(struct.iter_unpack(fmt,buf))
+
+    def read_array(self,dtype,N):
+        """Read N values of the specified numpy dtype into an array"""
+        arr = np.empty(N, dtype=dtype)
+        if self.f.readinto(arr) < arr.nbytes:
+            raise IOError
+        return arr
+
     # integers
     def read_int1(self,N=1):
-        if N==1: return self.unpack('b',self.f.read(1))[0] #short
-        else: return self.unpack('{:d}b',self.f.read(N*1))[0:N] #short
+        if N==1: return self.read_struct(self._s_int1) #short
+        else: return self.read_array(np.int8,N) #short
     def read_int2(self,N=1):
-        if N==1: return self.unpack('h',self.f.read(2))[0] #short
-        else: return self.unpack('{:d}h'.format(N),self.f.read(N*2))[0:N] #short
+        if N==1: return self.read_struct(self._s_int2) #short
+        else: return self.read_array(np.int16,N) #short
     def read_int4(self,N=1):
-        if N==1: return self.unpack('i',self.f.read(4))[0] #int
-        else: return self.unpack('{:d}i'.format(N),self.f.read(N*4))[0:N] #int
+        if N==1: return self.read_struct(self._s_int4) #int
+        else: return self.read_array(np.int32,N) #int
     def read_int8(self,N=1):
-        if N==1: return self.unpack('l',self.f.read(8))[0] #long
-        else: return self.unpack('{:d}l'.format(N),self.f.read(N*8))[0:N] #long
+        if N==1: return self.read_struct(self._s_int8) #long
+        else: return self.read_array(np.int64,N) #long
 
     # floats
     def read_float(self,N=1,dtype=float):
-        if N==1: return dtype( self.unpack('f',self.f.read(4))[0] )
-        else: return [ dtype(val) for val in self.unpack('{:d}f'.format(N),self.f.read(N*4))[0:N] ]
+        if N==1: return dtype( self.read_struct(self._s_float) )
+        else: return self.read_array(np.float32,N).astype(dtype,copy=False)
     def read_double(self,N=1):
-        if N==1: return self.unpack('d',self.f.read(8))[0]
-        else: return self.unpack('{:d}d'.format(N),self.f.read(N*8))[0:N]
+        if N==1: return self.read_struct(self._s_double)
+        else: return self.read_array(np.float64,N)
     def read_real4(self,N=1):
         return self.read_float(N,dtype=np.float32)
     def read_real8(self,N=1):
@@ -90,7 +122,7 @@ class binaryfile:
     def write_int1(self,val): self.write_type(val,'b')
     def write_int2(self,val): self.write_type(val,'h')
     def write_int4(self,val): self.write_type(val,'i')
-    def write_int8(self,val): self.write_type(val,'l')
+    def write_int8(self,val): self.write_type(val,'q')
 
     def write_int(self,val): self.write_int4(val)
     def write_float(self,val): self.write_type(val,'f')
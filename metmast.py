@@ -21,8 +21,7 @@ def load_sonic_data(fname,height=None,calculate_speed_direction=True):
     if height is not None:
         df['z'] = height
     df['speed'] = np.sqrt(df['u']**2 + df['v']**2 + df['w']**2)
-    df['direction'] = 180.0/np.pi*np.arctan2(-df['u'],-df['v'])
-    df.loc[df['direction'] < 0, 'direction'] += 360.0
+    df['direction'] = np.remainder(np.degrees(np.arctan2(-df['u'],-df['v'])), 360.0)
     return df
 
 
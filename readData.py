@@ -106,15 +106,13 @@ def structuredVTK(fileName):
       c = d.split()
       fieldName.append(c[0])
       fieldDim.append(int(c[1]))
-      dataArray = np.zeros((fieldDim[m], dims[0], dims[1], dims[2]))
-      for i in range(dims[0]):
-          for k in range(dims[2]):
-              for j in range(dims[1]):
-                  l = f.readline()
-                  l = l.split()
-                  for n in range(fieldDim[m]):
-                      dataArray[n][i][j][k] = float(l[n])
-                      
+      # Points are stored with i varying slowest, then k, then j, so read
+      # the whole block at once and reorder to (n, i, j, k).
+      nPoints = dims[0]*dims[1]*dims[2]
+      data = np.loadtxt(f, max_rows=nPoints, ndmin=2)
+      data = data[:,:fieldDim[m]].T.reshape((fieldDim[m], dims[0], dims[2], dims[1]))
+      dataArray = np.ascontiguousarray(np.transpose(data, (0,1,3,2)))
+
       field.append(dataArray)
   
   
@@ -147,57 +145,38 @@ def ensight(fileNameMesh,fileNameField,readFieldOnly,dims):
   # Read in the geometry.
   if (readFieldOnly == 0):
       # Open the mesh file
-      f = open(fileNameMesh,'r')
-  
-  
-      # Get the data length.
-      for i in range(8):
-          f.readline()
-      dims = int(f.readline())
-      f.close()
-  
-  
-      # Read in the x,y,z data.
-      data = np.genfromtxt(fileNameMesh,skip_header=9,max_rows=dims*3)
-      x = np.zeros(dims)
-      y = np.zeros(dims)
-      z = np.zeros(dims)
-      x = data[0:dims]
-      y = data[dims:2*dims]
-      z = data[2*dims:3*dims]
-      
-      
-      
-      
-  
-    
+      with open(fileNameMesh,'r') as f:
+          # Get the data length.
+          for i in range(8):
+              f.readline()
+          dims = int(f.readline())
+
+          # Read in the x,y,z data.
+          data = np.loadtxt(f,max_rows=dims*3)
+      x, y, z = data.reshape((3,dims))
+
+
   # Read in the field data.
-  f = open(fileNameField,'r')
-  
-  
-  # Get the data type
-  fieldDim = 0
-  dataType = f.readline().strip('\n')
-  
-  if (dataType == 'scalar'):
-      fieldDim = 1
-  elif (dataType == 'vector'):
-      fieldDim = 3
-  elif (dataType == 'tensor'):
-      fieldDim = 9
+  with open(fileNameField,'r') as f:
+      # Get the data type
+      fieldDim = 0
+      dataType = f.readline().strip('\n')
+
+      if (dataType == 'scalar'):
+          fieldDim = 1
+      elif (dataType == 'vector'):
+          fieldDim = 3
+      elif (dataType == 'tensor'):
+          fieldDim = 9
+
+      # Read the field
+      for i in range(3):
+          f.readline()
+      data = np.loadtxt(f,max_rows=dims*fieldDim)
+
+  field = data.reshape((fieldDim,dims)).T.copy()
 
-  f.close()
-  
-      
-  # Read the field
-  field = np.zeros((dims,fieldDim))
-  data = np.genfromtxt(fileNameField,skip_header=4,max_rows=dims*fieldDim)
-  
-  for i in range(fieldDim):
-      field[0:dims,i] = data[i*dims:(i+1)*dims]
 
-  
-  
   # Return the data.
   return dims, x, y, z, fieldDim, field
 
@@ -212,6 +191,7 @@ def ensight(fileNameMesh,fileNameField,readFieldOnly,dims):
 def planarAverages(averagingDirectory,varName):
     # Import necessary modules.
     import numpy as np
+    import pandas as pd
     import getDataLayout
 
 
@@ -224,32 +204,30 @@ def planarAverages(averagingDirectory,varName):
     
     
     # For each time directory, read the data and concatenate.
-    tInt = []
-    dtInt = []
-    dataInt = []
     t = []
     dt = []
     data = []
     for i in range(nTimes):
-        a = np.genfromtxt(averagingDirectory + '/' + outputTimes[i] + '/' + varName)
+        a = pd.read_csv(averagingDirectory + '/' + outputTimes[i] + '/' + varName,
+                        sep=r'\s+', header=None, comment='#',
+                        dtype=np.float64, engine='c').values
         tInt = a[:,0]
         dtInt = a[:,1]
         dataInt = a[:,2:]
 
         if (i < nTimes-1):
             tNext = float(outputTimes[i+1])
-            index = np.argmax(np.abs(tInt >= tNext))
+            index = np.searchsorted(tInt,tNext)
         else:
             index = len(tInt)
             
-        if (i == 0):
-            t = tInt[0:index]
-            dt = dtInt[0:index]
-            data = dataInt[0:index,:]
-        else:
-            t = np.concatenate((t,tInt[0:index]),axis=0)
-            dt = np.concatenate((dt,dtInt[0:index]),axis=0)
-            data = np.concatenate((data,dataInt[0:index,:]),axis=0)
+        t.append(tInt[0:index])
+        dt.append(dtInt[0:index])
+        data.append(dataInt[0:index,:])
+
+    t = np.concatenate(t,axis=0)
+    dt = np.concatenate(dt,axis=0)
+    data = np.concatenate(data,axis=0)
     
     
     return z, t, dt, data
@@ -73,22 +73,26 @@ def windcube_v1(fname,
                            parse_dates=[['date', 'time']],
                            dayfirst=True)
         
-    # unpivot the columns
-    um_vars = [ 'um'+str(i) for i in range(1,len(altitudes)+1) ]
-    vm_vars = [ 'vm'+str(i) for i in range(1,len(altitudes)+1) ]
-    um = pd.melt(df, id_vars=['date_time'], var_name='um_var', value_name='um', value_vars=um_vars)
-    vm = pd.melt(df, id_vars=['date_time'], var_name='vm_var', value_name='vm', value_vars=vm_vars)
-    um['height'] = um['um_var'].map(dict(zip(um_vars, altitudes)))
-    vm['height'] = vm['vm_var'].map(dict(zip(vm_vars, altitudes)))
-    newdf = pd.merge(um, vm, on=['date_time','height'])
-    
+    # unpivot the columns: um/vm values are stored in row-major order,
+    #   i.e., all heights for each time
+    Nrows = len(df)
+    Nalt = len(altitudes)
+    um_vars = [ 'um'+str(i) for i in range(1,Nalt+1) ]
+    vm_vars = [ 'vm'+str(i) for i in range(1,Nalt+1) ]
+    um = df[um_vars].to_numpy(dtype=np.float64)
+    vm = df[vm_vars].to_numpy(dtype=np.float64)
+
     # calculate wind speed and direction
-    newdf['speed'] = np.sqrt(newdf['um']**2 + newdf['vm']**2)
-    newdf['direction'] = 270.0 - 180.0/np.pi*np.arctan2(newdf['vm'],newdf['um'])
-    newdf.loc[newdf['direction'] > 360.0,'direction'] -= 360.0
+    speed = np.hypot(um, vm)
+    direction = np.remainder(270.0 - np.degrees(np.arctan2(vm, um)), 360.0)
     
     # return calculated columns only
-    newdf = newdf[['date_time','height','speed','direction']]    
+    newdf = pd.DataFrame({
+        'date_time': np.repeat(df['date_time'].values, Nalt),
+        'height': np.tile(np.asarray(altitudes), Nrows),
+        'speed': speed.ravel(),
+        'direction': direction.ravel(),
+    })
     if return_header:
         return newdf, scan_info
     else:
@@ -121,8 +125,10 @@ def read_profiler_data_block(f,datatypes=['WINDS','RASS']):
     block = []
     line = f.readline()
     while not line.strip()=='$' and not line=='':
-        block.append(line.split())
+        block.append(line)
         line = f.readline()
+    if block:
+        block = np.loadtxt(block,ndmin=2)
     df = pd.DataFrame(data=block,columns=header,dtype=float)
     df['date_time'] = date_time
     return df
@@ -226,10 +232,9 @@ def ARL_wind_profiler(fname,
             _,year,month,day,time,_ = firstline.replace('"','').split(',')
             date_time = pd.to_datetime('{}{}{} {}'.format(year,month,day,time[:5])) # time format is "HH:MM"
             f.readline() # ignore sodar operating parameters
-            block = []
-            for _ in range(Nh):
-                block.append(f.readline().strip().split(','))
-            df = pd.DataFrame(data=block,columns=header,dtype=float)
+            block = [ f.readline() for _ in range(Nh) ]
+            block = np.genfromtxt(block,delimiter=',',dtype=np.float64,ndmin=2)
+            df = pd.DataFrame(data=block,columns=header)
             assert(np.all(df['height_m'].values==range_gates)) # make sure we're always reading the number of rows we think we are
             df['date_time'] = date_time
             df.loc[df['windspeed_ms']==bad_speed_value,'windspeed_ms'] = np.nan # flag bad values